@@ -16,7 +16,9 @@ datas = [
 # Hidden imports that might be missed
 hidden_imports = [
     "onnxruntime",
+    "onnxconverter_common",
     "cv2",
+    "numba",
     "pygame",
     "multiprocessing",
     "win32gui",
@@ -1,5 +1,11 @@
 import dxcam
 import time
+import threading
+import ctypes
+from ctypes import wintypes
+import comtypes
+from dxcam._libs.d3d11 import ID3D11Texture2D, D3D11_TEXTURE2D_DESC, D3D11_USAGE_STAGING, D3D11_CPU_ACCESS_READ
+from dxcam._libs.dxgi import DXGI_OUTDUPL_FRAME_INFO, IDXGIResource, IDXGISurface, DXGI_MAPPED_RECT, DXGI_ERROR_WAIT_TIMEOUT
 import cv2
 import numpy as np
 import win32gui
@@ -8,6 +14,119 @@ import win32con
 import win32api
 import time
 
+BI_RGB = 0
+DIB_RGB_COLORS = 0
+
+class BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [
+        ("biSize", wintypes.DWORD),
+        ("biWidth", wintypes.LONG),
+        ("biHeight", wintypes.LONG),
+        ("biPlanes", wintypes.WORD),
+        ("biBitCount", wintypes.WORD),
+        ("biCompression", wintypes.DWORD),
+        ("biSizeImage", wintypes.DWORD),
+        ("biXPelsPerMeter", wintypes.LONG),
+        ("biYPelsPerMeter", wintypes.LONG),
+        ("biClrUsed", wintypes.DWORD),
+        ("biClrImportant", wintypes.DWORD),
+    ]
+
+class BITMAPINFO(ctypes.Structure):
+    _fields_ = [
+        ("bmiHeader", BITMAPINFOHEADER),
+        ("bmiColors", wintypes.DWORD * 3),
+    ]
+
+class D3D11_BOX(ctypes.Structure):
+    _fields_ = [
+        ("left", wintypes.UINT),
+        ("top", wintypes.UINT),
+        ("front", wintypes.UINT),
+        ("right", wintypes.UINT),
+        ("bottom", wintypes.UINT),
+        ("back", wintypes.UINT),
+    ]
+
+# dxcam only declares CopyResource on the immediate context, so call
+# ID3D11DeviceContext::CopySubresourceRegion (vtable slot 46) directly
+_CopySubresourceRegion = ctypes.WINFUNCTYPE(
+    None, ctypes.c_void_p, ctypes.c_void_p, wintypes.UINT, wintypes.UINT, wintypes.UINT, wintypes.UINT,
+    ctypes.c_void_p, wintypes.UINT, ctypes.POINTER(D3D11_BOX)
+)(46, "CopySubresourceRegion")
+
+_gdi32 = ctypes.windll.gdi32
+_gdi32.CreateDIBSection.argtypes = [
+    wintypes.HDC, ctypes.POINTER(BITMAPINFO), wintypes.UINT,
+    ctypes.POINTER(ctypes.c_void_p), wintypes.HANDLE, wintypes.DWORD
+]
+_gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+
+_kernel32 = ctypes.windll.kernel32
+CREATE_WAITABLE_TIMER_HIGH_RESOLUTION = 0x00000002
+TIMER_ALL_ACCESS = 0x001F0003
+INFINITE = 0xFFFFFFFF
+
+class HighResTimer:
+    """
+    Sleeps on a high-resolution waitable timer (Windows 10 1803+), which wakes within
+    ~0.5 ms instead of rounding up to the system timer tick like time.sleep.
+    Falls back to time.sleep where such timers can't be created.
+    """
+    def __init__(self):
+        self._handle = None
+        try:
+            _kernel32.CreateWaitableTimerExW.restype = wintypes.HANDLE
+            handle = _kernel32.CreateWaitableTimerExW(None, None, CREATE_WAITABLE_TIMER_HIGH_RESOLUTION, TIMER_ALL_ACCESS)
+            if handle:
+                self._handle = handle
+        except Exception as e:
+            print(f"High resolution timer unavailable, using time.sleep: {e}")
+
+    @property
+    def precise(self):
+        # False when sleeping falls back to time.sleep
+        return self._handle is not None
+
+    def sleep(self, seconds):
+        if self._handle is None:
+            time.sleep(seconds)
+            return
+        # Negative due time: relative, in 100 ns units
+        due = ctypes.c_longlong(-max(1, int(seconds * 10_000_000)))
+        if _kernel32.SetWaitableTimer(wintypes.HANDLE(self._handle), ctypes.byref(due), 0, None, None, False):
+            _kernel32.WaitForSingleObject(wintypes.HANDLE(self._handle), INFINITE)
+        else:
+            time.sleep(seconds)
+
+    def close(self):
+        if self._handle is not None:
+            _kernel32.CloseHandle(wintypes.HANDLE(self._handle))
+            self._handle = None
+
+THREAD_PRIORITY_NORMAL = 0
+THREAD_PRIORITY_HIGHEST = 2
+THREAD_PRIORITY_TIME_CRITICAL = 15
+
+def pin_current_thread(mask, priority):
+    """
+    Restricts the calling thread to the CPUs in mask (no migrations, so no cache refills
+    on another core; None leaves the affinity alone) and sets its priority.
+    Returns the previous mask, or None.
+    """
+    try:
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentThread.restype = wintypes.HANDLE
+        kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+        kernel32.SetThreadAffinityMask.argtypes = [wintypes.HANDLE, ctypes.c_size_t]
+        thread = kernel32.GetCurrentThread()
+        previous = (kernel32.SetThreadAffinityMask(thread, mask) or None) if mask is not None else None
+        kernel32.SetThreadPriority(thread, priority)
+        return previous
+    except Exception as e:
+        print(f"Could not pin thread: {e}")
+        return None
+
 class ScreenCapture:
     def __init__(self, region=None, device_idx=0, output_color="RGB", mode="dxcam"):
         """
@@ -17,8 +136,15 @@ class ScreenCapture:
         """
         self.mode = mode
         self.camera = None
+        # BGRA -> output conversion we do ourselves on the GPU-crop and BitBlt paths
+        self._cvt_code = {"RGB": cv2.COLOR_BGRA2RGB, "BGR": cv2.COLOR_BGRA2BGR}.get(output_color)
         if self.mode == "dxcam":
-            self.camera = dxcam.create(device_idx=device_idx, output_color=output_color)
+            try:
+                self.camera = dxcam.create(device_idx=device_idx, output_color=output_color)
+            except Exception as e:
+                # No desktop duplication (RDP session, unsupported driver...): GDI capture
+                print(f"DXGI Desktop Duplication unavailable, falling back to BitBlt: {e}")
+                self.mode = "bitblt"
         
         self.region = region
         self.is_capturing = False
@@ -28,38 +154,206 @@ class ScreenCapture:
         self._mfc_dc = None
         self._save_dc = None
         self._save_bitmap = None
+        self._bgra_view = None
         self._last_dims = (0, 0)
+
+        # DXGI region-sized staging texture (GPU-side crop)
+        self._crop_texture = None
+        self._crop_surface = None
+        self._crop_dims = (0, 0)
+        self._gpu_crop = True
+        # Set once _copy_region_dxgi has handed the desktop frame back
+        self._crop_released = False
+
+        # Producer thread ring (see start_ring_capture)
+        self._ring = None
+        self._ring_seq = 0
+        self._ring_event = threading.Event()
+        self._ring_thread = None
+        self._ring_running = False
+        # Recycled output frames while the ring runs (see _frame_buffer)
+        self._pool = None
+        self._pool_size = 0
+        self._pool_idx = 0
         
-    def capture_frame(self):
+    def capture_frame(self, timeout_ms=0, only_new=True):
         """
         Captures a single frame based on the current mode.
+        :param timeout_ms: (dxcam) How long to block in DXGI waiting for a new desktop frame.
+        :param only_new: (dxcam) Return None for updates that only moved the mouse pointer.
         """
         if self.mode == "dxcam":
-            return self._capture_dxcam()
+            return self._capture_dxcam(timeout_ms, only_new)
         else:
             return self._capture_bitblt()
 
-    def _capture_dxcam(self):
+    def _capture_dxcam(self, timeout_ms=0, only_new=True):
         frame = None
-        if self.region:
-            frame = self.camera.grab(region=self.region)
-        else:
-            frame = self.camera.grab()
+        try:
+            frame = self._grab_dxgi(timeout_ms, only_new)
+        except Exception:
+            # Let dxcam handle output changes / access lost on its own path
+            if self.region:
+                frame = self.camera.grab(region=self.region)
+            else:
+                frame = self.camera.grab()
         
-        if frame is None:
+        if frame is None and self.is_capturing:
             frame = self.camera.get_latest_frame()
             
         return frame
 
+    def _grab_dxgi(self, timeout_ms, only_new):
+        """
+        Same as DXCamera.grab, but lets AcquireNextFrame block in the kernel for up to
+        timeout_ms instead of returning immediately, so idle desktops don't spin the caller.
+        """
+        region = self.region if self.region else self.camera.region
+        self.camera._validate_region(region)
+
+        dup = self.camera._duplicator
+        info = DXGI_OUTDUPL_FRAME_INFO()
+        res = ctypes.POINTER(IDXGIResource)()
+        try:
+            dup.duplicator.AcquireNextFrame(timeout_ms, ctypes.byref(info), ctypes.byref(res))
+        except comtypes.COMError as ce:
+            if ctypes.c_int32(DXGI_ERROR_WAIT_TIMEOUT).value == ce.args[0]:
+                return None
+            raise
+
+        # LastPresentTime stays 0 when only the mouse pointer changed: skip the texture copy
+        if only_new and info.LastPresentTime == 0:
+            dup.duplicator.ReleaseFrame()
+            return None
+
+        try:
+            dup.texture = res.QueryInterface(ID3D11Texture2D)
+        except comtypes.COMError:
+            dup.duplicator.ReleaseFrame()
+            return None
+
+        if self._gpu_crop and self.camera.rotation_angle == 0:
+            self._crop_released = False
+            try:
+                return self._copy_region_dxgi(dup, region)
+            except Exception as e:
+                print(f"GPU-side crop unavailable, using full-output staging: {e}")
+                self._gpu_crop = False
+                self._release_crop_texture()
+                # Failed after the frame was released: its texture can't be copied any more,
+                # so this frame is skipped and the next grab takes the full-output path
+                if self._crop_released:
+                    return None
+
+        self.camera._device.im_context.CopyResource(self.camera._stagesurf.texture, dup.texture)
+        dup.release_frame()
+        rect = self.camera._stagesurf.map()
+        frame = self.camera._processor.process(rect, self.camera.width, self.camera.height, region, self.camera.rotation_angle)
+        self.camera._stagesurf.unmap()
+        return frame
+
+    def _copy_region_dxgi(self, dup, region):
+        """
+        Copies only the capture region of the desktop texture into a staging texture of the
+        same size, so the GPU -> system memory readback is the region instead of the whole output.
+        """
+        left, top, right, bottom = region
+        width, height = right - left, bottom - top
+        if (width, height) != self._crop_dims or self._crop_texture is None:
+            self._init_crop_texture(width, height)
+
+        box = D3D11_BOX(left, top, 0, right, bottom, 1)
+        context = ctypes.cast(self.camera._device.im_context, ctypes.c_void_p)
+        src = ctypes.cast(dup.texture, ctypes.c_void_p)
+        dst = ctypes.cast(self._crop_texture, ctypes.c_void_p)
+        _CopySubresourceRegion(context, dst, 0, 0, 0, 0, src, 0, ctypes.byref(box))
+
+        rect = DXGI_MAPPED_RECT()
+        self._crop_surface.Map(ctypes.byref(rect), 1) # DXGI_MAP_READ
+        # The desktop frame goes back only once the staging copy is mapped: until then a
+        # failure here leaves it held for grab()'s full-output fallback
+        dup.release_frame()
+        self._crop_released = True
+        try:
+            if self._cvt_code is None:
+                frame = self.camera._processor.process(rect, width, height, (0, 0, width, height), 0)
+            else:
+                # Converted straight out of the mapping (no intermediate bytes copy) into a pooled frame
+                pitch = int(rect.Pitch)
+                address = ctypes.cast(rect.pBits, ctypes.c_void_p).value
+                mapped = np.ctypeslib.as_array((ctypes.c_uint8 * (pitch * height)).from_address(address))
+                bgra = mapped.reshape(height, pitch // 4, 4)[:, :width]
+                frame = cv2.cvtColor(bgra, self._cvt_code, dst=self._frame_buffer(height, width))
+        finally:
+            self._crop_surface.Unmap()
+        return frame
+
+    def _frame_buffer(self, height, width):
+        """
+        Storage for the next output frame. While the ring capture runs, frames cycle through
+        a fixed pool of ring slots + 2 buffers, so the steady state allocates nothing: a frame
+        stays intact until that many newer frames have been captured. Otherwise a new array.
+        """
+        if not self._pool_size:
+            return np.empty((height, width, 3), dtype=np.uint8)
+        if self._pool is None or self._pool[0].shape[:2] != (height, width):
+            self._pool = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(self._pool_size)]
+            self._pool_idx = 0
+        frame = self._pool[self._pool_idx]
+        self._pool_idx = (self._pool_idx + 1) % self._pool_size
+        return frame
+
+    def _init_crop_texture(self, width, height):
+        self._release_crop_texture()
+        desc = D3D11_TEXTURE2D_DESC()
+        desc.Width = width
+        desc.Height = height
+        desc.Format = self.camera._stagesurf.dxgi_format
+        desc.MipLevels = 1
+        desc.ArraySize = 1
+        desc.SampleDesc.Count = 1
+        desc.SampleDesc.Quality = 0
+        desc.Usage = D3D11_USAGE_STAGING
+        desc.CPUAccessFlags = D3D11_CPU_ACCESS_READ
+        desc.MiscFlags = 0
+        desc.BindFlags = 0
+        texture = ctypes.POINTER(ID3D11Texture2D)()
+        self.camera._device.device.CreateTexture2D(ctypes.byref(desc), None, ctypes.byref(texture))
+        self._crop_texture = texture
+        self._crop_surface = texture.QueryInterface(IDXGISurface)
+        self._crop_dims = (width, height)
+
+    def _release_crop_texture(self):
+        # comtypes releases the COM references when the pointers are dropped
+        self._crop_surface = None
+        self._crop_texture = None
+        self._crop_dims = (0, 0)
+
     def _init_bitblt_resources(self, width, height):
         self._cleanup_gdi()
         hwnd = win32gui.GetDesktopWindow()
         self._hwnd_dc = win32gui.GetWindowDC(hwnd)
         self._mfc_dc = win32ui.CreateDCFromHandle(self._hwnd_dc)
         self._save_dc = self._mfc_dc.CreateCompatibleDC()
-        self._save_bitmap = win32ui.CreateBitmap()
-        self._save_bitmap.CreateCompatibleBitmap(self._mfc_dc, width, height)
-        self._save_dc.SelectObject(self._save_bitmap)
+
+        # Top-down 32bpp DIB section: BitBlt writes straight into memory we can see from NumPy,
+        # so there is no GetBitmapBits copy into a fresh bytes object every frame.
+        bmi = BITMAPINFO()
+        bmi.bmiHeader.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+        bmi.bmiHeader.biWidth = width
+        bmi.bmiHeader.biHeight = -height
+        bmi.bmiHeader.biPlanes = 1
+        bmi.bmiHeader.biBitCount = 32
+        bmi.bmiHeader.biCompression = BI_RGB
+        bits = ctypes.c_void_p()
+        self._save_bitmap = _gdi32.CreateDIBSection(self._hwnd_dc, ctypes.byref(bmi), DIB_RGB_COLORS, ctypes.byref(bits), None, 0)
+        if not self._save_bitmap or not bits.value:
+            raise OSError("CreateDIBSection failed")
+        win32gui.SelectObject(self._save_dc.GetSafeHdc(), self._save_bitmap)
+
+        # 32bpp rows are already DWORD aligned, so the stride is exactly width * 4
+        buf = (ctypes.c_uint8 * (height * width * 4)).from_address(bits.value)
+        self._bgra_view = np.ctypeslib.as_array(buf).reshape(height, width, 4)
         self._last_dims = (width, height)
 
     def _cleanup_gdi(self):
@@ -88,16 +382,18 @@ class ScreenCapture:
                 pass
             self._hwnd_dc = None
             
+        # Drop the NumPy view before the DIB memory it points to is freed
+        self._bgra_view = None
         if self._save_bitmap:
             try:
-                win32gui.DeleteObject(self._save_bitmap.GetHandle())
+                win32gui.DeleteObject(self._save_bitmap)
             except:
                 pass
             self._save_bitmap = None
 
     def _capture_bitblt(self):
         """
-        Ultra-fast GDI Capture using GetDIBits and raw memory access.
+        Ultra-fast GDI Capture using a persistent DIB section and raw memory access.
         """
         try:
             if self.region is None:
@@ -117,24 +413,15 @@ class ScreenCapture:
             # 1. BitBlt to our compatible DC
             self._save_dc.BitBlt((0, 0), (width, height), self._mfc_dc, (left, top), win32con.SRCCOPY)
             
-            # 2. Extract bits directly to a pre-allocated numpy array for speed
-            # GetBitmapBits is very slow. GetDIBits is preferred but win32ui's GetBitmapBits 
-            # is often a wrapper. Let's use the fastest possible way.
-            # signedIntsArray = self._save_bitmap.GetBitmapBits(True) # This is a slow copy
-            
-            # Optimization: Use the fact that Pygame can read BGRA directly
-            # and that we can avoid cv2.cvtColor by just reversing the last channel if needed
-            # For now, let's use the buffer and reshape.
-            # Note: We keep RGBA to avoid cvtColor.
-            
-            data = self._save_bitmap.GetBitmapBits(True)
-            img = np.frombuffer(data, dtype='uint8')
-            img.shape = (height, width, 4)
-            
-            # Return RGB (discard alpha and flip BGR if necessary)
-            # This slice is much faster than cv2.cvtColor
-            # We use .copy() to ensure the array is contiguous for Pygame frombuffer
-            return img[:, :, :3][:, :, ::-1].copy() 
+            # 2. Make sure GDI has finished writing into the DIB before we read it
+            _gdi32.GdiFlush()
+            img = self._bgra_view
+
+            # Return RGB (discard alpha and swap BGR -> RGB)
+            # cvtColor does this in a single SIMD pass and already returns a contiguous
+            # array for Pygame frombuffer, no strided slice + generic NumPy copy needed.
+            # Written into a pooled frame buffer while the ring runs (see _frame_buffer).
+            return cv2.cvtColor(img, self._cvt_code or cv2.COLOR_BGRA2RGB, dst=self._frame_buffer(height, width))
             
         except Exception as e:
             self._cleanup_gdi()
@@ -151,10 +438,98 @@ class ScreenCapture:
     def get_latest_frame(self):
         return self.camera.get_latest_frame()
 
+    def start_ring_capture(self, target_fps=30, slots=3, cpu=None):
+        """
+        Starts a producer thread that captures at target_fps into a small ring of slots,
+        so capturing overlaps with whatever the consumer does with the previous frame.
+        Works for both modes; read frames back with read_latest().
+        cpu: logical CPU to pin the producer to (it also runs at raised priority).
+        """
+        self.stop_ring_capture()
+        self._ring = [None] * slots
+        # Ring slots + the frame the consumer is working on + the one being captured
+        self._pool_size = slots + 2
+        self._ring_seq = 0
+        self._ring_event.clear()
+        self._ring_running = True
+        self._ring_thread = threading.Thread(target=self._ring_worker, args=(target_fps, cpu), daemon=True)
+        self._ring_thread.start()
+
+    def _ring_worker(self, target_fps, cpu=None):
+        # Threads don't inherit their creator's affinity or priority: set them here
+        pin_current_thread(1 << cpu if cpu is not None else None, THREAD_PRIORITY_HIGHEST)
+        interval = 1.0 / target_fps if target_fps > 0 else 1.0 / 30.0
+        # Deadline pacing: each capture is scheduled one interval after the previous
+        # deadline, not after the previous capture finished, so capture time doesn't drift the rate
+        next_deadline = time.perf_counter()
+        timer = HighResTimer()
+        failing = False
+        try:
+            while self._ring_running:
+                sleep_for = next_deadline - time.perf_counter()
+                if sleep_for > 0:
+                    timer.sleep(sleep_for)
+                next_deadline += interval
+                # More than an interval behind (stall, window moved...): resync rather than burst
+                now = time.perf_counter()
+                if now - next_deadline > interval:
+                    next_deadline = now + interval
+
+                # Block in DXGI for at most one interval instead of polling idle frames
+                try:
+                    frame = self.capture_frame(timeout_ms=int(interval * 1000))
+                except Exception as e:
+                    # A failed grab (device lost, window gone...) mustn't end the thread: skip an
+                    # interval and retry. Logged once per run of failures, not every frame
+                    if not failing:
+                        print(f"Ring capture failed, retrying: {e}")
+                        failing = True
+                    next_deadline = time.perf_counter() + interval
+                    continue
+                if failing:
+                    print("Ring capture recovered")
+                    failing = False
+                if frame is None:
+                    continue
+
+                # Publishing is just a reference store (frames come from the recycled pool).
+                # Single-producer: the slot is written before the sequence number moves.
+                self._ring[self._ring_seq % len(self._ring)] = frame
+                self._ring_seq += 1
+                self._ring_event.set()
+        finally:
+            timer.close()
+
+    def read_latest(self, last_seq, timeout=0.1):
+        """
+        Returns (frame, seq) for the newest ring frame newer than last_seq, waiting up to
+        timeout seconds for one. frame is None if nothing new arrived in time.
+        The frame's buffer is reused once slots + 1 newer frames have been captured:
+        copy whatever must outlive that.
+        """
+        if self._ring_seq == last_seq:
+            self._ring_event.wait(timeout)
+            self._ring_event.clear()
+        seq = self._ring_seq
+        if seq == last_seq or self._ring is None:
+            return None, last_seq
+        return self._ring[(seq - 1) % len(self._ring)], seq
+
+    def stop_ring_capture(self):
+        self._ring_running = False
+        if self._ring_thread is not None:
+            self._ring_thread.join(timeout=1.0)
+            self._ring_thread = None
+        self._ring = None
+        self._pool = None
+        self._pool_size = 0
+
     def stop_capture(self):
+        self.stop_ring_capture()
         if self.is_capturing and self.camera is not None:
             self.camera.stop()
             self.is_capturing = False
+        self._release_crop_texture()
         self._cleanup_gdi()
 
 if __name__ == "__main__":
@@ -2,54 +2,181 @@ import cv2
 import numpy as np
 import os
 import requests
+import sys
+from numba import njit, prange
+
+# Numba can't cache compiled kernels next to the sources inside a frozen (PyInstaller) build
+_NUMBA_CACHE = not getattr(sys, "frozen", False)
+
+def _make_cas_kernel(ch):
+    """
+    CAS kernel for ch-channel images, passed as (h, w * ch) uint8 rows. ch is a
+    compile-time constant of the closure, so neighbour offsets are literals and LLVM
+    can vectorize the row loops (with a runtime channel stride it couldn't).
+    """
+    @njit(parallel=True, fastmath=True, cache=_NUMBA_CACHE)
+    def _cas_kernel(img, amount, out):
+        """
+        CAS in one pass, per channel: 3x3 local min/max -> adaptive weight
+        sqrt(min(lo, 1 - hi) / hi) * amount, then out = c + w * (4c - N - S - E - W)
+        written straight to uint8.
+        Borders follow the OpenCV chain it replaces: min/max over the in-frame neighbours only
+        (erode/dilate), reflect-101 for the Laplacian (filter2D).
+        """
+        h, n = img.shape
+        w = n // ch
+        inv = np.float32(1.0 / 255.0)
+        for y in prange(h):
+            y0, y1 = max(y - 1, 0), min(y + 1, h - 1)
+            yu = y - 1 if y > 0 else min(1, h - 1)
+            yd = y + 1 if y < h - 1 else max(h - 2, 0)
+            up, mid, dn, ru, rd, o = img[y0], img[y], img[y1], img[yu], img[yd], out[y]
+            
+            # Column-wise min/max over the 3 rows, so each 3x3 window is 3 + 3 compares.
+            # These and the centre row get one pixel of padding on each side: every index
+            # below is i + offset, never i - offset, so no negative-index wraparound is emitted
+            vmin = np.empty(n + 2 * ch, dtype=np.uint8)
+            vmax = np.empty(n + 2 * ch, dtype=np.uint8)
+            row = np.empty(n + 2 * ch, dtype=np.uint8)
+            for i in range(n):
+                a, b, d = up[i], mid[i], dn[i]
+                vmin[i + ch] = min(a, min(b, d))
+                vmax[i + ch] = max(a, max(b, d))
+                row[i + ch] = b
+            xl, xr = min(1, w - 1) * ch, max(w - 2, 0) * ch
+            for c in range(ch):
+                vmin[c], vmax[c] = vmin[ch + c], vmax[ch + c]
+                vmin[n + ch + c], vmax[n + ch + c] = vmin[n + c], vmax[n + c]
+                row[c], row[n + ch + c] = mid[xl + c], mid[xr + c]
+            
+            for i in range(n):
+                lo = np.float32(min(vmin[i], min(vmin[i + ch], vmin[i + 2 * ch]))) * inv
+                hi = max(np.float32(max(vmax[i], max(vmax[i + ch], vmax[i + 2 * ch]))) * inv, np.float32(1e-5))
+                center = np.int32(row[i + ch])
+                lap = 4 * center - np.int32(ru[i]) - np.int32(rd[i]) - np.int32(row[i]) - np.int32(row[i + 2 * ch])
+                
+                # The weight is lower in high contrast (edges) to prevent halos
+                wt = np.sqrt(min(lo, np.float32(1.0) - hi) / hi)
+                r = np.float32(center) * inv + np.float32(lap) * inv * (wt * amount)
+                r = min(max(r, np.float32(0.0)), np.float32(1.0))
+                o[i] = np.uint8(r * np.float32(255.0))
+    return _cas_kernel
+
+# Per channel count: RGB frames and single-channel images
+_CAS_KERNELS = {1: _make_cas_kernel(1), 3: _make_cas_kernel(3)}
+
+@njit(parallel=True, fastmath=True, cache=_NUMBA_CACHE)
+def _unsharp_up2_kernel(img, blurred, amount, out):
+    """
+    Rows of (h, w * 3) uint8 RGB: out = img * (1 + amount) - up * amount, where up is the
+    exact 2x bilinear upsample of the half-res blurred (3/4 + 1/4 taps, replicate borders,
+    what cv2.resize INTER_LINEAR computes for 2x) built one row at a time, so the
+    full-res blur is never written out. out may be img.
+    """
+    h, n = img.shape
+    hh, hn = blurred.shape
+    k0 = np.float32(1.0 + amount)
+    k1 = np.float32(-amount)
+    for y in prange(h):
+        ky = min(y // 2, hh - 1)
+        ny = min(max(ky + 2 * (y % 2) - 1, 0), hh - 1)
+        a, b = blurred[ky], blurred[ny]
+        # Vertical taps, padded one pixel on each side so the horizontal taps are all i + offset
+        v = np.empty(hn + 6, dtype=np.float32)
+        for i in range(hn):
+            v[i + 3] = np.float32(a[i]) * np.float32(0.75) + np.float32(b[i]) * np.float32(0.25)
+        for c in range(3):
+            v[c] = v[c + 3]
+            v[hn + 3 + c] = v[hn + c]
+        up = np.empty(n, dtype=np.float32)
+        for k in range(hn // 3):
+            for c in range(3):
+                m = v[3 * k + c + 3] * np.float32(0.75)
+                up[6 * k + c] = m + v[3 * k + c] * np.float32(0.25)
+                up[6 * k + c + 3] = m + v[3 * k + c + 6] * np.float32(0.25)
+        # Same saturating, rounding mix as addWeighted. Two loops, so that with out = img
+        # neither one reads and writes the same array (LLVM would drop to scalar code)
+        src, o = img[y], out[y]
+        for j in range(n):
+            up[j] = np.float32(src[j]) * k0 + up[j] * k1 + np.float32(0.5)
+        for j in range(n):
+            o[j] = np.uint8(min(max(up[j], np.float32(0.0)), np.float32(255.0)))
+
+def unsharp_up2(img, blurred, amount, out=None):
+    """
+    Unsharp mask of an (h, w, 3) frame against its blur taken at exactly half size
+    ((h / 2, w / 2), even h and w): the upsample and the mix in one pass, within 1 level
+    of cv2.resize + cv2.addWeighted. Returns out (a new frame if None; img itself is fine).
+    """
+    h = img.shape[0]
+    if out is None:
+        out = np.empty_like(img)
+    _unsharp_up2_kernel(img.reshape(h, -1), blurred.reshape(blurred.shape[0], -1), np.float32(amount), out.reshape(h, -1))
+    return out
+
+def resize(img, dsize, interpolation=cv2.INTER_LINEAR, dst=None):
+    """
+    cv2.resize, except that host uint8 Lanczos4 runs in float32: OpenCV has no vectorized
+    uint8 Lanczos4 pass, but does for float, so converting there and back (one saturating,
+    rounding pass) is still 20-25% faster, within 1 level. Bilinear / bicubic uint8 already
+    take OpenCV's SIMD path and go straight through.
+    """
+    if interpolation != cv2.INTER_LANCZOS4 or isinstance(img, cv2.UMat) or img.dtype != np.uint8:
+        return cv2.resize(img, dsize, dst=dst, interpolation=interpolation)
+    out = cv2.resize(img.astype(np.float32), dsize, interpolation=cv2.INTER_LANCZOS4)
+    return cv2.multiply(out, (1.0, 1.0, 1.0, 1.0), dst=dst, dtype=cv2.CV_8U)
 
 class AMDFilters:
     @staticmethod
     def apply_cas(img, sharpness=0.5):
         """
         Improved AMD FidelityFX Contrast Adaptive Sharpening (CAS).
-        Optimized implementation that uses local min/max for adaptive weighting.
+        Optimized implementation that uses local min/max for adaptive weighting,
+        fused into a single compiled pass over the image (see _make_cas_kernel).
         """
         if sharpness <= 0: return img
+        if isinstance(img, cv2.UMat):
+            # T-API input (OpenCL): stay on the device with the OpenCV version
+            return AMDFilters._apply_cas_opencv(img, sharpness)
         
-        img_f = img.astype(np.float32) / 255.0
-        
-        # We need to process each channel or luminance
-        # Simplified but effective adaptive weighting
-        
-        # 3x3 local min/max (approx by erosions/dilations)
-        kernel = np.ones((3,3), np.uint8)
-        local_min = cv2.erode(img_f, kernel)
-        local_max = cv2.dilate(img_f, kernel)
-        
-        # AMD CAS Weight logic: 
-        # weight = sqrt(min(l, 1-max) / max) * sharpness
-        # We'll use a fast version:
-        # Avoid division by zero
-        local_max = np.maximum(local_max, 1e-5)
-        
-        # Calculate adaptive weight per pixel
-        # This weight is lower in high-contrast (edges) to prevent halos
-        w = np.sqrt(np.minimum(local_min, 1.0 - local_max) / local_max) * (sharpness * 0.5)
-        
-        # Standard sharpening kernel based on the weight
-        # [ 0 -w  0 ]
-        # [-w 1+4w -w]
-        # [ 0 -w  0 ]
-        
-        sharp_kernel = np.array([
-            [0, -1, 0],
-            [-1, 4, -1],
-            [0, -1, 0]
-        ], dtype=np.float32)
-        
-        details = cv2.filter2D(img_f, -1, sharp_kernel)
+        ch = img.shape[2] if img.ndim == 3 else 1
+        if ch not in _CAS_KERNELS:
+            return AMDFilters._apply_cas_opencv(img, sharpness)
+        src = np.ascontiguousarray(img)
+        out = np.empty_like(src)
+        h = src.shape[0]
+        _CAS_KERNELS[ch](src.reshape(h, -1), np.float32(sharpness * 0.5), out.reshape(h, -1))
+        return out
+
+    @staticmethod
+    def _apply_cas_opencv(img, sharpness):
+        """
+        Same CAS as the compiled kernel built from OpenCV ops (works on UMat). Only the adaptive
+        weight is float; the Laplacian stays on the int16 SIMD path.
+        """
+        kernel = np.ones((3, 3), np.uint8)
+        local_min = cv2.addWeighted(cv2.erode(img, kernel), 1.0 / 255.0, img, 0, 0, dtype=cv2.CV_32F)
+        local_max = cv2.addWeighted(cv2.dilate(img, kernel), 1.0 / 255.0, img, 0, 0, dtype=cv2.CV_32F)
+        local_max = cv2.max(local_max, 1e-5)
         
-        # Apply the adaptive weight to the high-frequency details
-        # Broadcast w (H,W,C) if needed, but erode/dilate handles channels
-        result = img_f + details * w
+        # weight = sqrt(min(min, 1 - max) / max) * sharpness * 0.5
+        headroom = cv2.addWeighted(local_max, -1.0, local_max, 0, 1.0)
+        w = cv2.sqrt(cv2.divide(cv2.min(local_min, headroom), local_max))
         
-        return (np.clip(result, 0, 1) * 255).astype(np.uint8)
+        # N + S + E + W - 4c (the negated sharpening Laplacian), reflect-101 borders like filter2D
+        lap = cv2.Laplacian(img, cv2.CV_16S, ksize=1)
+        details = cv2.multiply(lap, w, scale=-sharpness * 0.5, dtype=cv2.CV_32F)
+        # -0.5 turns the saturating round into the truncation the float version does
+        return cv2.addWeighted(img, 1.0, details, 1.0, -0.5, dtype=cv2.CV_8U)
+
+    @staticmethod
+    def warmup():
+        """
+        Compiles (or loads from cache) the CAS and sharpening kernels, so neither the first
+        frame nor toggling FSR mid-game stalls.
+        """
+        AMDFilters.apply_cas(np.zeros((4, 4, 3), dtype=np.uint8), 0.5)
+        unsharp_up2(np.zeros((4, 4, 3), dtype=np.uint8), np.zeros((2, 2, 3), dtype=np.uint8), 0.5)
 
     @staticmethod
     def apply_easu(img, target_dim):
@@ -61,7 +188,7 @@ class AMDFilters:
         if (w, h) == target_dim: return img
         
         # Pass 1: High-quality Lanczos upscale
-        upscaled = cv2.resize(img, target_dim, interpolation=cv2.INTER_LANCZOS4)
+        upscaled = resize(img, target_dim, interpolation=cv2.INTER_LANCZOS4)
         
         # Pass 2: Light CAS to restore edge definition lost in scaling
         return AMDFilters.apply_cas(upscaled, sharpness=0.3)
@@ -74,25 +201,54 @@ class NvidiaAIUpscaler:
         self._init_session()
 
     def _download_model_if_missing(self):
+        # Delete if corrupted (too small)
+        if os.path.exists(self.model_path) and os.path.getsize(self.model_path) < 1000:
+            print(f"Deleting corrupted model at {self.model_path}")
+            os.remove(self.model_path)
+
         if not os.path.exists(self.model_path):
             os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
             print(f"Downloading AI model to {self.model_path}...")
             # Using a public lightweight FSRCNN ONNX model
             url = "https://github.com/onuralpszener/FSRCNN-PyTorch/raw/master/fsrcnn_x2.onnx"
+            # Streamed to a temporary file so an interrupted download is never loaded next run
+            tmp_path = self.model_path + ".part"
             try:
-                r = requests.get(url, allow_redirects=True)
-                with open(self.model_path, 'wb') as f:
-                    f.write(r.content)
+                r = requests.get(url, allow_redirects=True, timeout=60, stream=True)
+                r.raise_for_status()
+                with open(tmp_path, 'wb') as f:
+                    for chunk in r.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
+                if os.path.getsize(tmp_path) < 1000:
+                    raise ValueError("downloaded file is too small")
+                os.replace(tmp_path, self.model_path)
                 print("Model downloaded successfully.")
             except Exception as e:
                 print(f"Failed to download model: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
 
     def _init_session(self):
         try:
             import onnxruntime as ort
-            providers = ['CUDAExecutionProvider', 'CPUExecutionProvider']
+            # Any GPU vendor: CUDA (NVIDIA), ROCm (AMD, Linux), DirectML (all vendors on Windows),
+            # OpenVINO (Intel), then CPU. Only the ones this onnxruntime build ships are requested.
+            preferred = [
+                'CUDAExecutionProvider',
+                'ROCMExecutionProvider',
+                ('DmlExecutionProvider', {'device_id': 0}),
+                'OpenVINOExecutionProvider',
+                'CPUExecutionProvider'
+            ]
+            available = ort.get_available_providers()
+            providers = [p for p in preferred if (p[0] if isinstance(p, tuple) else p) in available]
             self.session = ort.InferenceSession(self.model_path, providers=providers)
-            print(f"Inference session initialized with {self.session.get_providers()}")
+            
+            used_providers = self.session.get_providers()
+            print(f"Inference session initialized with {used_providers}")
+            if used_providers[0] == 'CPUExecutionProvider':
+                print("WARNING: AI SuperRes is running on CPU. Performance will be low.")
+                print("HINT: Install 'onnxruntime-directml' for GPU acceleration on Windows.")
         except Exception as e:
             print(f"Error initializing ONNX session: {e}")
 
@@ -120,6 +276,7 @@ class NvidiaAIUpscaler:
         
         # Post-process: (1, C, H, W) -> (H, W, C)
         output = np.transpose(output[0], (1, 2, 0))
-        output = (np.clip(output, 0, 1) * 255).astype(np.uint8)
+        # C-contiguous cast: the transposed view would otherwise keep its planar strides
+        output = (np.clip(output, 0, 1) * 255).astype(np.uint8, order='C')
         
         return output
@@ -0,0 +1,145 @@
+import multiprocessing
+from multiprocessing import shared_memory
+from queue import Empty
+import numpy as np
+
+class SharedFrameRing:
+    """
+    Single-producer / single-consumer frame ring in shared memory, for passing frames
+    between processes without pickling them through a pipe.
+
+    put() never blocks: the producer overwrites the oldest slot when the ring is full.
+    get() copies the oldest unread frame out of its slot and checks afterwards that the
+    producer didn't lap it meanwhile, so no lock is taken on either side: each slot carries
+    the sequence number of the frame in it (-1 while being written), read before and after
+    the copy (seqlock style). A ring of N slots therefore holds N unread frames.
+    The consumer only sleeps on the event when the ring is actually empty.
+    """
+    def __init__(self, max_shape, slots=4):
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.slot_bytes = -(-int(np.prod(self.max_shape)) // 64) * 64
+        # Header: published frame count, then (h, w, c) per slot, then each slot's frame
+        # sequence number; frames follow 64-byte aligned
+        self._seq_offset = 64 + -(-slots * 3 * 4 // 64) * 64
+        self._data_offset = self._seq_offset + -(-slots * 8 // 64) * 64
+        self._shm = shared_memory.SharedMemory(create=True, size=self._data_offset + slots * self.slot_bytes)
+        self._owner = True
+        self._event = multiprocessing.Event()
+        self._attach()
+        self._head[0] = 0
+        self._seqs[:] = -1
+
+    def _attach(self):
+        buf = self._shm.buf
+        self._head = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=0)
+        self._meta = np.ndarray((self.slots, 3), dtype=np.int32, buffer=buf, offset=64)
+        self._seqs = np.ndarray((self.slots,), dtype=np.int64, buffer=buf, offset=self._seq_offset)
+        self._data = np.ndarray((self.slots, self.slot_bytes), dtype=np.uint8, buffer=buf, offset=self._data_offset)
+        # Consumer-side read position (each process keeps its own)
+        self._tail = 0
+
+    def __getstate__(self):
+        # Shared memory is re-attached by name in the other process
+        return {"slots": self.slots, "max_shape": self.max_shape, "slot_bytes": self.slot_bytes,
+                "seq_offset": self._seq_offset, "data_offset": self._data_offset,
+                "name": self._shm.name, "event": self._event}
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.max_shape = state["max_shape"]
+        self.slot_bytes = state["slot_bytes"]
+        self._seq_offset = state["seq_offset"]
+        self._data_offset = state["data_offset"]
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._event = state["event"]
+        self._attach()
+
+    def put(self, frame):
+        """
+        Publishes a uint8 frame (at most max_shape bytes). Never blocks.
+        """
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {frame.shape} does not fit the ring slots {self.max_shape}")
+        seq = int(self._head[0])
+        slot = seq % self.slots
+        # Marked as being written first, so a reader copying the frame it held sees the change
+        self._seqs[slot] = -1
+        self._data[slot, :frame.nbytes].reshape(frame.shape)[...] = frame
+        self._meta[slot] = frame.shape if frame.ndim == 3 else frame.shape + (1,)
+        # The slot is written before its sequence number and the count move
+        self._seqs[slot] = seq
+        self._head[0] = seq + 1
+        self._event.set()
+
+    def get(self, timeout=None, out=None):
+        """
+        Returns a copy of the oldest unread frame, waiting up to timeout seconds
+        (None: forever, 0: not at all). Raises queue.Empty if nothing arrived.
+        The copy goes into out when given and of the frame's shape.
+        """
+        while True:
+            head = int(self._head[0])
+            if self._tail == head:
+                if timeout == 0:
+                    raise Empty
+                self._event.clear()
+                # Re-check after clearing so a put() in between isn't missed
+                if self._tail == int(self._head[0]) and not self._event.wait(timeout):
+                    raise Empty
+                continue
+
+            # Fell behind by more than the ring holds: the oldest frames were overwritten
+            seq = max(self._tail, head - self.slots)
+            slot = seq % self.slots
+            if int(self._seqs[slot]) != seq:
+                # Already being overwritten by a newer frame
+                self._tail = seq + 1
+                continue
+            h, w, c = (int(v) for v in self._meta[slot])
+            n = h * w * c
+            frame = None
+            if 0 < n <= self.slot_bytes:
+                src = self._data[slot, :n].reshape((h, w, c) if c > 1 else (h, w))
+                if out is not None and out.shape == src.shape:
+                    np.copyto(out, src)
+                    frame = out
+                else:
+                    frame = src.copy()
+
+            # The producer started rewriting the slot while copying: the copy may be torn,
+            # so skip ahead and try again
+            if frame is None or int(self._seqs[slot]) != seq:
+                self._tail = seq + 1
+                continue
+            self._tail = seq + 1
+            return frame
+
+    def close(self):
+        self._head = self._meta = self._seqs = self._data = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+class FramePool:
+    """
+    Round-robin set of preallocated uint8 frames for a stage whose outputs are held
+    downstream for a bounded time: a buffer is handed out again only after size - 1 newer
+    ones, so size must exceed the number of frames the consumer can hold at once.
+    """
+    def __init__(self, size):
+        self.size = size
+        self._bufs = [None] * size
+        self._next = 0
+
+    def get(self, shape):
+        i = self._next
+        self._next = (i + 1) % self.size
+        buf = self._bufs[i]
+        if buf is None or buf.shape != tuple(shape):
+            buf = self._bufs[i] = np.empty(shape, dtype=np.uint8)
+        return buf
@@ -1,20 +1,28 @@
 import cv2
 import numpy as np
 import pygame
+try:
+    from pygame._sdl2.video import Window, Renderer, Texture
+except ImportError:
+    Window = Renderer = Texture = None
 import threading
 import time
 import ctypes
+from ctypes import wintypes
 import multiprocessing
-from queue import Queue
-from capture import ScreenCapture
-from engine import RIFEEngine, RIFEONNXEngine
+from queue import Empty, SimpleQueue
+from collections import deque
+from capture import ScreenCapture, HighResTimer, pin_current_thread, THREAD_PRIORITY_NORMAL, THREAD_PRIORITY_HIGHEST, THREAD_PRIORITY_TIME_CRITICAL
+from frame_ring import SharedFrameRing, FramePool
+from engine import RIFEEngine, RIFEONNXEngine, frames_differ, frame_rows, _performance_core_ids
 from ui import GameSelectorUI
-from selector import WindowSelector
-from filters import AMDFilters, NvidiaAIUpscaler
+from selector import WindowSelector, WindowTracker
+from filters import AMDFilters, NvidiaAIUpscaler, resize, unsharp_up2
 import win32gui
 import win32con
 import win32api
 import os
+import sys
 
 def processing_subroutine(capture_queue, process_queue, engine_config, stop_event):
     """
@@ -26,40 +34,95 @@ def processing_subroutine(capture_queue, process_queue, engine_config, stop_even
     
     # Initialize engine inside the process
     if engine_config.get("engine_type") == "AI (RIFE ONNX)":
-        engine = RIFEONNXEngine()
+        # Frames arrive at the ring resolution for the whole session
+        engine = RIFEONNXEngine(precision=engine_config.get("precision", "auto"),
+                                input_size=engine_config.get("input_size"))
     else:
         engine = RIFEEngine()
         
     if hasattr(engine, 'set_high_precision'):
-        engine.set_high_precision(engine_config.get("ultra_smooth", False))
+        engine.set_high_precision(engine_config.get("ultra_smooth", False), engine_config.get("fast_warp", False))
 
     fg_enabled = engine_config.get("fg_enabled", True)
-    internal_res = engine_config.get("internal_res", (800, 600))
     last_frame = None
 
     print(f"Sub-process processing worker started (PID: {os.getpid()})")
     
+    # Pairs waiting in the capture queue are interpolated together by engines that batch
+    batched = fg_enabled and hasattr(engine, 'interpolate_batch')
+    max_batch = 4
+    # Ultra Smooth on the ONNX engine: three frames per pair (t = 0.25, 0.5, 0.75) from one
+    # upload of the pair; half the pairs per batch, so a full batch is still 8 frames
+    # (2 pairs x 4) and fits the process ring (see FrameGenerationApp.run)
+    timesteps = None
+    if fg_enabled and engine_config.get("ultra_smooth") and hasattr(engine, 'interpolate_multi'):
+        timesteps = (0.25, 0.5, 0.75)
+        batched = False
+        max_batch = 2
+
     while not stop_event.is_set():
         try:
             # We use a small timeout to check the stop_event periodically
-            current_frame = capture_queue.get(timeout=0.1)
-            
-            # Internal Scaling
-            h, w = current_frame.shape[:2]
-            if w > internal_res[0] or h > internal_res[1]:
-                current_frame = cv2.resize(current_frame, internal_res, interpolation=cv2.INTER_LINEAR)
-
-            if fg_enabled and last_frame is not None:
-                inter_frame = engine.interpolate(last_frame, current_frame)
-                process_queue.put(inter_frame)
-                process_queue.put(current_frame)
+            # (frames arrive already scaled to internal_res by the capture worker)
+            frames = [capture_queue.get(timeout=0.1)]
+            # Only frames that are already queued join the batch: never wait for more
+            while (batched or timesteps) and len(frames) < max_batch:
+                try:
+                    frames.append(capture_queue.get(timeout=0))
+                except Empty:
+                    break
+
+            # Each frame is paired with the one before it; the very first frame has none
+            if last_frame is None:
+                process_queue.put(frames[0])
+                sequence = frames
             else:
+                sequence = [last_frame] + frames
+            pairs = list(zip(sequence[:-1], sequence[1:]))
+            
+            if fg_enabled and pairs:
+                if timesteps:
+                    inter_frames = [engine.interpolate_multi(a, b, timesteps) for a, b in pairs]
+                elif batched:
+                    inter_frames = [[f] for f in engine.interpolate_batch(pairs)]
+                else:
+                    inter_frames = [[engine.interpolate(a, b)] for a, b in pairs]
+            for i, (_, current_frame) in enumerate(pairs):
+                if fg_enabled:
+                    for inter in inter_frames[i]:
+                        process_queue.put(inter)
                 process_queue.put(current_frame)
             
-            last_frame = current_frame
+            last_frame = frames[-1]
         except:
             continue
 
+_log_queue = SimpleQueue()
+_log_thread = None
+_log_lock = threading.Lock()
+
+def _log_writer():
+    while True:
+        sys.stdout.write(_log_queue.get() + "\n")
+        sys.stdout.flush()
+
+def log(message):
+    """
+    print() for the pipeline threads: the console write (a synchronous WriteConsole that
+    can block for milliseconds) happens on a background thread, not on the caller's.
+    """
+    global _log_thread
+    if _log_thread is None:
+        with _log_lock:
+            if _log_thread is None:
+                _log_thread = threading.Thread(target=_log_writer, daemon=True)
+                _log_thread.start()
+    _log_queue.put(message)
+
+VK_F9, VK_F10, VK_F11 = 0x78, 0x79, 0x7A
+MOD_NOREPEAT = 0x4000
+WM_HOTKEY = 0x0312
+
 class FrameGenerationApp:
     def __init__(self, target_fps=60):
         self.target_fps = target_fps
@@ -68,18 +131,22 @@ class FrameGenerationApp:
         self.running = False
         self.target_window = None
         
-        # Queues for pipeline (Use multiprocessing queues for inter-process communication)
-        self.capture_queue = multiprocessing.Queue(maxsize=2)
-        self.process_queue = multiprocessing.Queue(maxsize=3)
-        self.display_queue = Queue(maxsize=5) # Lighter buffer for lower latency
+        # Queues for pipeline: shared-memory frame rings across the process boundary
+        # (created per session in run(), sized to the internal resolution)
+        self.capture_queue = None
+        self.process_queue = None
+        self.display_queue = deque(maxlen=5) # Lighter buffer for lower latency
         
         # Stats
         self.frame_count = 0
         self.start_time = 0
         self.current_fps = 0
+        self._hud_fps = 0 # FPS the HUD shows, refreshed once a second (see _hud_surface)
+        self._hud_fps_time = 0.0
         
         # Window & Performance management
         self.last_rect = None
+        self.window_rect = None # Latest target window rect, polled by capture_worker
         self.show_fps = True
         self.hotkey_cooldown = 0
         self.scale_factor = 1.0
@@ -90,88 +157,251 @@ class FrameGenerationApp:
         self.fsr_mode = False # Toggle for AMD CAS/EASU
         self.ai_mode = False # Toggle for NVIDIA AI SuperRes
         self.ai_upscaler = None
+        self.thread_cpus = {} # Logical CPU per hot thread, see _thread_cpus()
+        self._hud_cache = {} # Pre-rendered HUD surfaces keyed by (shown FPS, toggles)
+
+    @staticmethod
+    def _thread_cpus():
+        """
+        One logical CPU each for the display, capture and post-processing threads: every
+        other id (one per physical core with SMT, leaving the siblings to the thread pools),
+        P-cores only on hybrid CPUs, skipping CPU 0 (most interrupts land there).
+        Empty if there aren't enough cores to dedicate.
+        """
+        cpus = (_performance_core_ids() or list(range(os.cpu_count() or 1)))[::2]
+        cpus = [c for c in cpus if c != 0]
+        if len(cpus) < 3 or max(cpus) >= 64:
+            return {}
+        return {"display": cpus[0], "capture": cpus[1], "post": cpus[2]}
+
+    @staticmethod
+    def _display_renderer():
+        """
+        The SDL renderer behind the current SCALED display window, or None if this
+        pygame build can't expose it (frames are then blitted and flipped as usual).
+        """
+        try:
+            return Renderer.from_window(Window.from_display_module())
+        except Exception as e:
+            log(f"SDL renderer not available, using surface blits: {e}")
+            return None
+
+    def _hud_surface(self, font):
+        """
+        The status box for the current FPS and toggles. Glyphs are only rasterized the
+        first time a state is shown; after that it is one cached surface per state.
+        The shown FPS only moves once a second, so the text (and texture) changes that often.
+        """
+        now = time.perf_counter()
+        if now - self._hud_fps_time >= 1.0:
+            self._hud_fps = int(self.current_fps)
+            self._hud_fps_time = now
+        key = (self._hud_fps, self.fsr_mode, self.ai_mode, self.ultra_smooth)
+        hud = self._hud_cache.get(key)
+        if hud is None:
+            if len(self._hud_cache) > 256:
+                self._hud_cache.clear()
+            fps_text = font.render(f"FPS: {key[0]}", True, (0, 255, 0))
+            fsr_text = font.render(f"(F9) FSR: {'ON' if self.fsr_mode else 'OFF'}", True, (255, 200, 0) if self.fsr_mode else (150, 150, 150))
+            ai_text = font.render(f"AI SuperRes: {'ON' if self.ai_mode else 'OFF'}", True, (0, 255, 200) if self.ai_mode else (150, 150, 150))
+            # Extra status for new modes
+            mode_text = font.render(f"Mode: {'SMOOTH' if self.ultra_smooth else 'STD'}", True, (0, 200, 255))
+
+            # Draw status box (its own small surface, placed at (10, 10))
+            hud = pygame.Surface((200, 110)).convert()
+            hud.fill((0, 0, 0))
+            pygame.draw.rect(hud, (50, 50, 50), hud.get_rect(), 2)
+            hud.blit(fps_text, (10, 5))
+            hud.blit(fsr_text, (10, 30))
+            hud.blit(ai_text, (10, 55))
+            hud.blit(mode_text, (10, 80))
+            self._hud_cache[key] = hud
+        return key, hud
 
     def capture_worker(self):
-        print("Capture worker started")
-        last_frame = None
-        # Target capture is exactly half the display FPS
-        capture_interval = 1.0 / (self.target_fps / 2) if self.target_fps > 0 else 1.0/30.0
+        log("Capture worker started")
+        if "capture" in self.thread_cpus:
+            pin_current_thread(1 << self.thread_cpus["capture"], THREAD_PRIORITY_HIGHEST)
+        # Compared rows of the last queued frame: a private copy, since the capture thread
+        # recycles its frame buffers
+        last_rows = None
+        last_seq = 0
+        # Target capture is the display FPS over the frames shown per captured one
+        # Capturing runs on ScreenCapture's own producer thread; we only consume the newest frame
+        # The producer thread shares this thread's core: the two alternate, never run together
+        self.capture.start_ring_capture(target_fps=self.target_fps / self.frames_per_capture if self.target_fps > 0 else 30,
+                                        cpu=self.thread_cpus.get("capture"))
         
-        last_capture_time = time.perf_counter()
+        # Window moves arrive as events: no GetWindowRect call per frame
+        tracker = None
+        try:
+            tracker = WindowTracker(self.target_window["hwnd"]) if self.target_window else None
+        except Exception:
+            log("Lost window, stopping...")
+            self.running = False
         
         while self.running:
             # Update region based on window position
-            if self.target_window:
+            if tracker is not None:
                 try:
-                    rect = WindowSelector.get_window_rect(self.target_window["hwnd"])
+                    rect = tracker.get_rect()
                     self.capture.region = rect # Update region
+                    # Shared with the display loop, which follows window moves/resizes from it
+                    self.window_rect = rect
                 except:
-                    print("Lost window, stopping...")
+                    log("Lost window, stopping...")
                     self.running = False
                     break
             
-            now = time.perf_counter()
-            if now - last_capture_time < capture_interval:
-                time.sleep(0.001)
-                continue
-            
-            last_capture_time = now
-            frame = self.capture.capture_frame()
+            frame, last_seq = self.capture.read_latest(last_seq, timeout=0.1)
             
             if frame is not None:
-                # Optimized duplicate check
-                is_duplicate = False
-                if last_frame is not None:
-                    try:
-                        # Slice check is very fast
-                        if np.array_equal(frame[10:30:2, 10:30:2], last_frame[10:30:2, 10:30:2]):
-                            if np.array_equal(frame[::60, ::60], last_frame[::60, ::60]):
-                                is_duplicate = True
-                    except: pass
+                # Optimized duplicate check: every 32nd full row against the last queued frame's
+                rows = frame_rows(frame)
+                is_duplicate = last_rows is not None and not frames_differ(rows, last_rows, step=1)
                 
                 if not is_duplicate:
-                    if self.capture_queue.full():
-                        try: self.capture_queue.get_nowait()
-                        except: pass
+                    # Kept in one reused buffer; reallocated only when the frame size changes
+                    if last_rows is None or last_rows.shape != rows.shape:
+                        last_rows = rows.copy()
+                    else:
+                        np.copyto(last_rows, rows)
+                    # Internal Scaling: done before the hand-off so only internal-res frames
+                    # cross into the processing process
+                    h, w = frame.shape[:2]
+                    if w > self.ring_res[0] or h > self.ring_res[1]:
+                        frame = cv2.resize(frame, self.ring_res, interpolation=cv2.INTER_LINEAR)
+                    # The ring overwrites the oldest frame when full
                     self.capture_queue.put(frame)
-                    last_frame = frame
+        
+        if tracker is not None:
+            tracker.stop()
+
 
+    def _on_hotkey(self, vk):
+        if vk == VK_F11:
+            log("Stop key pressed. Returning to menu...")
+            self.running = False
+        elif vk == VK_F10:
+            self.show_fps = not self.show_fps
+        elif vk == VK_F9:
+            self.fsr_mode = not self.fsr_mode
+            log(f"FSR Mode: {'ON' if self.fsr_mode else 'OFF'}")
+
+    def hotkey_worker(self):
+        """
+        Global hotkeys via RegisterHotKey: Windows posts WM_HOTKEY to this thread (held keys
+        don't repeat), so nothing is polled. A ~10 Hz timer message wakes the pump to notice
+        the end of the session. Falls back to polling if a key is taken by another program.
+        """
+        user32 = ctypes.windll.user32
+        keys = {1: VK_F11, 2: VK_F10, 3: VK_F9}
+        registered = [i for i, vk in keys.items() if user32.RegisterHotKey(None, i, MOD_NOREPEAT, vk)]
+        if len(registered) < len(keys):
+            for i in registered:
+                user32.UnregisterHotKey(None, i)
+            log("Hotkeys already registered by another program, polling the keys instead")
+            self._poll_hotkeys()
+            return
+        
+        timer = user32.SetTimer(None, 0, 100, None)
+        try:
+            msg = wintypes.MSG()
+            while self.running and user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                if msg.message == WM_HOTKEY and msg.wParam in keys:
+                    self._on_hotkey(keys[msg.wParam])
+        finally:
+            user32.KillTimer(None, timer)
+            for i in keys:
+                user32.UnregisterHotKey(None, i)
+
+    def _poll_hotkeys(self):
+        """
+        Polls the global hotkeys at ~30 Hz, off the display loop (key presses are human-scale).
+        """
+        while self.running:
+            for vk in (VK_F11, VK_F10, VK_F9):
+                if win32api.GetAsyncKeyState(vk) & 0x8000:
+                    if vk == VK_F11 or time.time() - self.hotkey_cooldown > 0.3:
+                        self._on_hotkey(vk)
+                        self.hotkey_cooldown = time.time()
+            
+            time.sleep(1.0 / 30.0)
 
     def post_processing_worker(self):
-        print("Post-processing worker started")
+        log("Post-processing worker started")
+        if "post" in self.thread_cpus:
+            pin_current_thread(1 << self.thread_cpus["post"], THREAD_PRIORITY_HIGHEST)
+        # Full-res scratch for the sharpening blur at odd frame sizes, reused across frames
+        blur_buf = None
+        # Ring reads and display-size output frames are recycled, each through its own pool so
+        # the two shapes never take each other's slots. Either kind can end up queued: the
+        # display deque holds at most maxlen of them, plus the one being uploaded and the one
+        # being written here, and one spare
+        pool_size = self.display_queue.maxlen + 3
+        read_pool = FramePool(pool_size)
+        display_pool = FramePool(pool_size)
+        ring_shape = (self.ring_res[1], self.ring_res[0], 3)
+        # With OpenCL the default resize + sharpen chain runs on the GPU (T-API): one upload,
+        # and the frame only comes back to the host for the display
+        use_umat = cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+        read_buf = read_pool.get(ring_shape)
         while self.running:
-            if not self.process_queue.empty():
-                frame = self.process_queue.get()
+            # Block on the inter-process queue instead of polling it with sleeps
+            try:
+                frame = self.process_queue.get(timeout=0.1, out=read_buf)
+            except Empty:
+                # Nothing arrived: the same buffer waits for the next frame
+                continue
+            read_buf = read_pool.get(ring_shape)
+            
+            # Push to display
+            if self.ai_mode and self.ai_upscaler:
+                # AI Reconstruction
+                frame = self.ai_upscaler.upscale(frame)
+                # Final fit to display if AI output differs
+                if frame.shape[1] != self.display_dim[0] or frame.shape[0] != self.display_dim[1]:
+                    frame = cv2.resize(frame, self.display_dim, interpolation=cv2.INTER_LINEAR)
+            elif self.fsr_mode:
+                # High-Speed Resizing (EASU-style if FSR mode enabled)
+                if frame.shape[1] != self.display_dim[0] or frame.shape[0] != self.display_dim[1]:
+                    frame = AMDFilters.apply_easu(frame, self.display_dim)
+                else:
+                    frame = AMDFilters.apply_cas(frame, self.sharpness)
+            else:
+                img = cv2.UMat(frame) if use_umat else frame
+                h, w = frame.shape[:2]
+                if w != self.display_dim[0] or h != self.display_dim[1]:
+                    dst = None if use_umat else display_pool.get((self.display_dim[1], self.display_dim[0], 3))
+                    img = resize(img, self.display_dim, self.upscale_algo, dst=dst)
+                    w, h = self.display_dim
                 
-                # Push to display
-                if self.ai_mode and self.ai_upscaler:
-                    # AI Reconstruction
-                    frame = self.ai_upscaler.upscale(frame)
-                    # Final fit to display if AI output differs
-                    if frame.shape[1] != self.display_dim[0] or frame.shape[0] != self.display_dim[1]:
-                        frame = cv2.resize(frame, self.display_dim, interpolation=cv2.INTER_LINEAR)
-                elif self.fsr_mode:
-                    # High-Speed Resizing (EASU-style if FSR mode enabled)
-                    if frame.shape[1] != self.display_dim[0] or frame.shape[0] != self.display_dim[1]:
-                        frame = AMDFilters.apply_easu(frame, self.display_dim)
+                # Apply simple sharpening (Fallback): unsharp mask against a sigma-3 blur.
+                # The blur is taken at half res (2x2 area average, sigma 1.42, bilinear back up:
+                # within ~0.2 levels of the full-res sigma-3 Gaussian) so its 19-tap passes run
+                # on 1/4 of the pixels; the area/bilinear resamples are the cheapest full-res passes
+                if self.sharpness > 0:
+                    blurred = cv2.resize(img, (w // 2, h // 2), interpolation=cv2.INTER_AREA)
+                    blurred = cv2.GaussianBlur(blurred, (0, 0), 1.42)
+                    if use_umat:
+                        # Device buffers come from OpenCV's UMat pool
+                        blurred = cv2.resize(blurred, (w, h), interpolation=cv2.INTER_LINEAR)
+                        img = cv2.addWeighted(img, 1.0 + self.sharpness, blurred, -self.sharpness, 0)
+                    elif w % 2 == 0 and h % 2 == 0:
+                        # Upsample and mix fused row by row: each upsampled row is used while
+                        # still in L1, and the full-res blur is never written out.
+                        # In place: img is our own pooled copy (ring read or resize output)
+                        img = unsharp_up2(img, blurred, self.sharpness, out=img)
                     else:
-                        frame = AMDFilters.apply_cas(frame, self.sharpness)
-                else:
-                    if frame.shape[1] != self.display_dim[0] or frame.shape[0] != self.display_dim[1]:
-                        frame = cv2.resize(frame, self.display_dim, interpolation=self.upscale_algo)
-                    
-                    # Apply simple sharpening (Fallback)
-                    if self.sharpness > 0:
-                        blurred = cv2.GaussianBlur(frame, (0, 0), 3)
-                        frame = cv2.addWeighted(frame, 1.0 + self.sharpness, blurred, -self.sharpness, 0)
+                        if blur_buf is None or blur_buf.shape != img.shape:
+                            blur_buf = np.empty_like(img)
+                        blurred = cv2.resize(blurred, (w, h), dst=blur_buf, interpolation=cv2.INTER_LINEAR)
+                        img = cv2.addWeighted(img, 1.0 + self.sharpness, blurred, -self.sharpness, 0, dst=img)
+                frame = img.get() if use_umat else img
 
-                if self.display_queue.full():
-                    try: self.display_queue.get_nowait()
-                    except: pass
-                self.display_queue.put(frame)
-            else:
-                # Slight sleep to reduce CPU usage when idle
-                time.sleep(0.0005)
+            # Bounded deque: append() drops the oldest frame when full, and append/popleft
+            # are atomic, so the single producer/consumer pair needs no lock or condition
+            self.display_queue.append(frame)
 
     def select_game(self):
         ui = GameSelectorUI()
@@ -204,17 +434,30 @@ class FrameGenerationApp:
         
         self.sharpness = self.target_window["sharpness"] / 100.0 * 2.0 # Scale 0-100 to 0.0-2.0
         self.ultra_smooth = self.target_window.get("ultra_smooth", False)
+        self.fast_warp = self.target_window.get("fast_warp", False)
         if self.target_window.get("engine_type") == "AI (RIFE ONNX)":
-            self.engine = RIFEONNXEngine()
+            # Same precision as the sub-process: a converted FP16 / INT8 model is written here,
+            # before the sub-process starts, so the two never convert at once
+            self.engine = RIFEONNXEngine(precision=self.target_window.get("precision", "auto"))
         else:
             self.engine = RIFEEngine()
             
-        self.engine.set_high_precision(self.ultra_smooth) if hasattr(self.engine, 'set_high_precision') else None
+        self.engine.set_high_precision(self.ultra_smooth, self.fast_warp) if hasattr(self.engine, 'set_high_precision') else None
+        
+        # Displayed frames per captured one with frame generation: the real frame plus its
+        # interpolated ones (three in Ultra Smooth on the ONNX engine, see processing_subroutine)
+        self.frames_per_capture = 4 if self.ultra_smooth and isinstance(self.engine, RIFEONNXEngine) else 2
         
         # Adaptive Buffer based on latency selection
         self.low_latency = self.target_window.get("low_latency", True)
-        display_buf_size = 3 if self.low_latency else 15
-        self.display_queue = Queue(maxsize=display_buf_size)
+        # Low latency: the newest frames win. Interpolated and real frames arrive in groups,
+        # so one group is kept (an interpolated frame is never dropped for its real one);
+        # without frame generation that is a single latest-frame slot
+        if self.low_latency:
+            display_buf_size = self.frames_per_capture if self.fg_enabled else 1
+        else:
+            display_buf_size = 15
+        self.display_queue = deque(maxlen=display_buf_size)
 
         # Initial region
         rect = WindowSelector.get_window_rect(self.target_window["hwnd"])
@@ -252,10 +495,10 @@ class FrameGenerationApp:
         if self.scale_factor == -1: # Fullscreen
             info = pygame.display.Info()
             d_w, d_h = info.current_w, info.current_h
-            display_flags = pygame.NOFRAME | pygame.FULLSCREEN
+            display_flags = pygame.NOFRAME | pygame.FULLSCREEN | pygame.SCALED
         else:
             d_w, d_h = int(w * self.scale_factor), int(h * self.scale_factor)
-            display_flags = pygame.NOFRAME
+            display_flags = pygame.NOFRAME | pygame.SCALED
 
         if d_w <= 0 or d_h <= 0:
             print("Invalid window dimensions.")
@@ -263,11 +506,17 @@ class FrameGenerationApp:
 
         # Setup Borderless Window
         screen = pygame.display.set_mode((d_w, d_h), display_flags)
+        window_size = (d_w, d_h)
         pygame.display.set_caption("FG Overlay")
+        # SCALED windows are backed by an SDL renderer: frames go into one persistent
+        # streaming texture and are presented by the GPU instead of blitted into the window surface
+        renderer, texture = self._display_renderer(), None
         
         # FPS Font
         pygame.font.init()
         font = pygame.font.SysFont("Arial", 24, bold=True)
+        self._hud_cache.clear() # Rendered with the previous session's font
+        hud_key, hud_texture = None, None
         
         hwnd_pygame = pygame.display.get_wm_info()["window"]
         
@@ -288,6 +537,7 @@ class FrameGenerationApp:
         else:
             win32gui.SetWindowPos(hwnd_pygame, win32con.HWND_TOPMOST, rect[0], rect[1], d_w, d_h, win32con.SWP_SHOWWINDOW)
         self.last_rect = rect
+        self.window_rect = rect
 
         # Increase process priority for better smoothness
         try:
@@ -303,13 +553,28 @@ class FrameGenerationApp:
         # Prepare config for sub-process
         engine_config = {
             "engine_type": self.target_window.get("engine_type"),
+            "precision": self.target_window.get("precision", "auto"),
             "ultra_smooth": self.ultra_smooth,
-            "fg_enabled": self.fg_enabled,
-            "internal_res": self.internal_res
+            "fast_warp": self.fast_warp,
+            "fg_enabled": self.fg_enabled
         }
         
+        # F9 can switch FSR on at any time: have its kernel ready before the first frame
+        AMDFilters.warmup()
+        
         self.stop_event = multiprocessing.Event()
         
+        # Frames in both rings are at most internal_res (fixed for the session's sub-process).
+        # The processing side may publish a batch of inter + real frames at once: up to 8
+        # (4 pairs x 2, or 2 pairs x 4 in Ultra Smooth), plus one slot of headroom for the
+        # oldest frame while the post-processing thread is still copying it out.
+        self.ring_res = self.internal_res
+        ring_shape = (self.ring_res[1], self.ring_res[0], 3)
+        self.capture_queue = SharedFrameRing(ring_shape, slots=3)
+        self.process_queue = SharedFrameRing(ring_shape, slots=9)
+        engine_config["input_size"] = self.ring_res
+        
+        self.thread_cpus = self._thread_cpus()
         t_cap = threading.Thread(target=self.capture_worker, daemon=True)
         # Use multiprocessing for the heavy lifter
         p_proc = multiprocessing.Process(
@@ -318,111 +583,132 @@ class FrameGenerationApp:
             daemon=True
         )
         t_post = threading.Thread(target=self.post_processing_worker, daemon=True)
+        t_keys = threading.Thread(target=self.hotkey_worker, daemon=True)
         
         t_cap.start()
         p_proc.start()
         t_post.start()
+        t_keys.start()
         
         frame_interval = 1.0 / self.target_fps
         last_display_time = time.perf_counter()
+        # Sub-ms waits in the pacing loop, where time.sleep would round up to the timer tick
+        timer = HighResTimer()
+        spin_margin = 0.0005 if timer.precise else 0.002
+        # This thread is the display loop: its own core and top priority for steady pacing
+        display_mask = None
+        if "display" in self.thread_cpus:
+            display_mask = pin_current_thread(1 << self.thread_cpus["display"], THREAD_PRIORITY_TIME_CRITICAL)
+        
+        # Fixed for the session: bound to locals once instead of looked up every iteration.
+        # Only state other threads change (show_fps, window_rect, ...) is read from self
+        perf_counter = time.perf_counter
+        get_events = pygame.event.get
+        display_queue = self.display_queue
+        popleft = display_queue.popleft
+        # Buffer check: wait for at least 2 frames to be ready to absorb jitter
+        # in Low Latency mode, we are more aggressive
+        min_buffer = 1 if self.low_latency else 3
+        max_w, max_h = (1280, 720) if self.target_window.get("performance_mode") else (800, 600)
+        scale_factor = self.scale_factor
 
         try:
             while self.running:
-                # 4. Check for Global Hotkey (F11)
-                # VK_F11 = 0x7A
-                if win32api.GetAsyncKeyState(0x7A) & 0x8000:
-                    print("Stop key pressed. Returning to menu...")
-                    self.running = False
-                    break
-
-                for event in pygame.event.get():
+                # Global hotkeys (F9/F10/F11) are handled by hotkey_worker
+                for event in get_events():
                     if event.type == pygame.QUIT:
                         self.running = False
                 
                 # Precision Pacing Logic
-                now = time.perf_counter()
-                if now - last_display_time < frame_interval:
-                    # Busy-wait for the last 1ms for sub-ms precision
-                    if frame_interval - (now - last_display_time) < 0.001:
-                        pass # Busy wait
-                    else:
-                        time.sleep(0.0005)
+                now = perf_counter()
+                remaining = frame_interval - (now - last_display_time)
+                if remaining > 0:
+                    # One timer wait for most of the gap (core idle), then a short busy-wait
+                    # for sub-ms precision; plain sleeps overshoot more, so they stop earlier
+                    if remaining > spin_margin:
+                        timer.sleep(remaining - spin_margin)
                     continue
 
-                # Buffer check: wait for at least 2 frames to be ready to absorb jitter
-                # in Low Latency mode, we are more aggressive
-                min_buffer = 1 if self.low_latency else 3
-                if self.display_queue.qsize() < min_buffer and self.frame_count > 0:
-                    time.sleep(0.0005) # Shorter wait
+                if len(display_queue) < min_buffer and self.frame_count > 0:
+                    timer.sleep(0.0005) # Shorter wait
                     continue
 
-                if not self.display_queue.empty():
-                    frame = self.display_queue.get()
+                if display_queue:
+                    frame = popleft()
                     last_display_time = now
                     
-                    # Window sync (minimal overhead)
+                    # Window sync (minimal overhead): rect cached by capture_worker, no syscall here
                     try:
-                        t_rect = WindowSelector.get_window_rect(self.target_window["hwnd"])
-                        if self.last_rect != t_rect:
+                        t_rect = self.window_rect
+                        if t_rect is not None and self.last_rect != t_rect:
                             t_w, t_h = t_rect[2] - t_rect[0], t_rect[3] - t_rect[1]
                             
                             # Update internal res cap immediately
-                            max_w, max_h = (1280, 720) if self.target_window.get("performance_mode") else (800, 600)
                             if t_w > max_w: self.internal_res = (max_w, max_h)
                             else: self.internal_res = (t_w, t_h)
 
-                            if self.scale_factor != -1:
-                                d_w, d_h = int(t_w * self.scale_factor), int(t_h * self.scale_factor)
+                            if scale_factor != -1:
+                                d_w, d_h = int(t_w * scale_factor), int(t_h * scale_factor)
                                 self.display_dim = (d_w, d_h)
-                                if screen.get_width() != d_w or screen.get_height() != d_h:
-                                    screen = pygame.display.set_mode((d_w, d_h), pygame.NOFRAME)
-                                    hwnd_p = pygame.display.get_wm_info()["window"]
-                                    ctypes.windll.user32.SetWindowDisplayAffinity(hwnd_p, 0x00000011)
-                                    ex = win32gui.GetWindowLong(hwnd_p, win32con.GWL_EXSTYLE)
-                                    win32gui.SetWindowLong(hwnd_p, win32con.GWL_EXSTYLE, ex | win32con.WS_EX_LAYERED | win32con.WS_EX_TRANSPARENT)
-                                win32gui.SetWindowPos(hwnd_p, win32con.HWND_TOPMOST, t_rect[0], t_rect[1], d_w, d_h, win32con.SWP_NOACTIVATE)
+                                if window_size != (d_w, d_h):
+                                    resized = False
+                                    if renderer is not None:
+                                        # Resized in place: the SDL window and the renderer's logical size
+                                        # follow, while the context, textures, capture exclusion and
+                                        # layered style all survive (no black flash)
+                                        try:
+                                            Window.from_display_module().size = (d_w, d_h)
+                                            renderer.logical_size = (d_w, d_h)
+                                            resized = True
+                                        except Exception as e:
+                                            log(f"In-place resize failed, recreating the window: {e}")
+                                    if not resized:
+                                        screen = pygame.display.set_mode((d_w, d_h), pygame.NOFRAME | pygame.SCALED)
+                                        renderer, texture = self._display_renderer(), None
+                                        hud_key, hud_texture = None, None
+                                        hwnd_pygame = pygame.display.get_wm_info()["window"]
+                                        ctypes.windll.user32.SetWindowDisplayAffinity(hwnd_pygame, 0x00000011)
+                                        ex = win32gui.GetWindowLong(hwnd_pygame, win32con.GWL_EXSTYLE)
+                                        win32gui.SetWindowLong(hwnd_pygame, win32con.GWL_EXSTYLE, ex | win32con.WS_EX_LAYERED | win32con.WS_EX_TRANSPARENT)
+                                    window_size = (d_w, d_h)
+                                win32gui.SetWindowPos(hwnd_pygame, win32con.HWND_TOPMOST, t_rect[0], t_rect[1], d_w, d_h, win32con.SWP_NOACTIVATE)
                             self.last_rect = t_rect
                     except: pass
 
-                    # Blit and Flip (Now ultra-fast as frame is pre-processed)
-                    surface = pygame.image.frombuffer(frame.tobytes(), self.display_dim, 'RGB')
-                    screen.blit(surface, (0, 0))
-                    
-                    # Hotkeys & Stats
-                    if win32api.GetAsyncKeyState(0x79) & 0x8000: # F10
-                        if time.time() - self.hotkey_cooldown > 0.3:
-                            self.show_fps = not self.show_fps
-                            self.hotkey_cooldown = time.time()
-                    
-                    if win32api.GetAsyncKeyState(0x78) & 0x8000: # F9
-                        if time.time() - self.hotkey_cooldown > 0.3:
-                            self.fsr_mode = not self.fsr_mode
-                            self.hotkey_cooldown = time.time()
-                            print(f"FSR Mode: {'ON' if self.fsr_mode else 'OFF'}")
+                    # Upload and Present (Now ultra-fast as frame is pre-processed)
+                    # The surface wraps the frame's own memory (no tobytes() copy). Sized from the
+                    # frame itself so a resize racing the post-processing thread can't misread the buffer.
+                    if not frame.flags['C_CONTIGUOUS']:
+                        frame = np.ascontiguousarray(frame)
+                    f_size = (frame.shape[1], frame.shape[0])
+                    surface = pygame.image.frombuffer(frame, f_size, 'RGB')
+                    dirty_rects = []
+                    if renderer is not None:
+                        # Texture is only recreated when the frame size changes
+                        if texture is None or (texture.width, texture.height) != f_size:
+                            texture = Texture(renderer, f_size, streaming=True)
+                        texture.update(surface)
+                        texture.draw()
+                    else:
+                        dirty_rects.append(screen.blit(surface, (0, 0)))
                     
+                    # Stats
                     if self.show_fps:
-                        status_color = (0, 255, 0)
-                        fps_text = font.render(f"FPS: {self.current_fps:.1f}", True, status_color)
-                        fsr_text = font.render(f"(F9) FSR: {'ON' if self.fsr_mode else 'OFF'}", True, (255, 200, 0) if self.fsr_mode else (150, 150, 150))
-                        
-                        ai_text = font.render(f"AI SuperRes: {'ON' if self.ai_mode else 'OFF'}", True, (0, 255, 200) if self.ai_mode else (150, 150, 150))
-
-                        # Extra status for new modes
-                        mode_text_str = "STD"
-                        if self.ultra_smooth: mode_text_str = "SMOOTH"
-                        mode_text = font.render(f"Mode: {mode_text_str}", True, (0, 200, 255))
-
-                        # Draw status box
-                        bg_rect = pygame.Rect(10, 10, 200, 110)
-                        pygame.draw.rect(screen, (0, 0, 0), bg_rect)
-                        pygame.draw.rect(screen, (50, 50, 50), bg_rect, 2)
-                        
-                        screen.blit(fps_text, (20, 15))
-                        screen.blit(fsr_text, (20, 40))
-                        screen.blit(ai_text, (20, 65))
-                        screen.blit(mode_text, (20, 90))
-
-                    pygame.display.flip()
+                        key, hud = self._hud_surface(font)
+                        if renderer is not None:
+                            # The HUD texture is only re-uploaded when its text changes
+                            if hud_key != key:
+                                hud_key, hud_texture = key, Texture.from_surface(renderer, hud)
+                            hud_texture.draw(dstrect=(10, 10, 200, 110))
+                        else:
+                            dirty_rects.append(screen.blit(hud, (10, 10)))
+
+                    # Only presented when a new frame was drawn (an empty queue presents nothing);
+                    # without a renderer just the regions blitted this iteration are pushed
+                    if renderer is not None:
+                        renderer.present()
+                    else:
+                        pygame.display.update(dirty_rects)
                     
                     self.frame_count += 1
                     if self.frame_count % 30 == 0:
@@ -430,7 +716,7 @@ class FrameGenerationApp:
                         self.current_fps = 30 / (t_now - self.start_time)
                         self.start_time = t_now
                 else:
-                    time.sleep(0.0005)
+                    timer.sleep(0.0005)
 
             # Removed clock.tick to rely on perf_counter pacing
         finally:
@@ -438,14 +724,37 @@ class FrameGenerationApp:
             self.stop_event.set() # Stop the sub-process
             self.capture.stop_capture()
             pygame.quit()
+            # Nothing may touch the rings once they are closed
+            t_cap.join(timeout=1.0)
+            # Hotkeys are unregistered before the next session registers them again
+            t_keys.join(timeout=1.0)
+            t_post.join(timeout=1.0)
+            p_proc.join(timeout=2.0)
+            self.capture_queue.close()
+            self.process_queue.close()
+            timer.close()
+            # Back to normal for the selection UI between sessions
+            if display_mask is not None:
+                pin_current_thread(display_mask, THREAD_PRIORITY_NORMAL)
         
         return True
 
 if __name__ == "__main__":
     multiprocessing.freeze_support()
+    # 1 ms timer resolution for the sleeps in the pacing loops (the Windows default is ~15.6 ms)
+    try:
+        ctypes.windll.winmm.timeBeginPeriod(1)
+    except Exception as e:
+        print(f"Could not raise timer resolution: {e}")
     app = FrameGenerationApp(target_fps=60)
-    while True:
-        if not app.run():
-            break
-        print("Waiting for next selection...")
-        time.sleep(0.5)
+    try:
+        while True:
+            if not app.run():
+                break
+            print("Waiting for next selection...")
+            time.sleep(0.5)
+    finally:
+        try:
+            ctypes.windll.winmm.timeEndPeriod(1)
+        except Exception:
+            pass
@@ -1,13 +1,53 @@
 import win32gui
 import win32process
 import psutil
+import threading
+import time
+import ctypes
+import os
+from ctypes import wintypes
+
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+WINEVENT_OUTOFCONTEXT = 0x0000
+OBJID_WINDOW = 0
+WM_QUIT = 0x0012
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+WINEVENTPROC = ctypes.WINFUNCTYPE(
+    None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+)
+
+def _process_name(pid):
+    """
+    Executable name of a process: one QueryFullProcessImageNameW call, with psutil
+    (which builds a whole Process object) only as the fallback.
+    """
+    kernel32 = ctypes.windll.kernel32
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if handle:
+        try:
+            buf = ctypes.create_unicode_buffer(260)
+            size = wintypes.DWORD(len(buf))
+            if kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+                return os.path.basename(buf.value)
+        finally:
+            kernel32.CloseHandle(handle)
+    return psutil.Process(pid).name()
 
 class WindowSelector:
+    # (hwnd, pid) -> process name from earlier sweeps: a Refresh only looks up new windows
+    _process_names = {}
+
     @staticmethod
     def get_visible_windows():
         """
         Returns a list of visible windows with their titles and HWNDs.
         """
+        names = WindowSelector._process_names
+        seen = {}
         def enum_handler(hwnd, windows):
             if win32gui.IsWindowVisible(hwnd):
                 title = win32gui.GetWindowText(hwnd)
@@ -15,14 +55,19 @@ class WindowSelector:
                     # Get process name
                     try:
                         _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                        process = psutil.Process(pid)
-                        proc_name = process.name()
+                        key = (hwnd, pid)
+                        proc_name = names.get(key)
+                        if proc_name is None:
+                            proc_name = _process_name(pid)
+                        seen[key] = proc_name
                         windows.append({"hwnd": hwnd, "title": title, "process": proc_name})
                     except:
                         pass
         
         windows = []
         win32gui.EnumWindows(enum_handler, windows)
+        # Closed windows drop out of the cache
+        WindowSelector._process_names = seen
         return windows
 
     @staticmethod
@@ -32,6 +77,88 @@ class WindowSelector:
         """
         return win32gui.GetWindowRect(hwnd)
 
+class WindowTracker:
+    """
+    Follows a window's rect from WinEvent notifications instead of polling GetWindowRect:
+    a hook thread refreshes it only when the window actually moves, resizes or closes.
+    Falls back to polling (at most every POLL_INTERVAL seconds) if the hooks can't be installed.
+    """
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, hwnd):
+        self.hwnd = hwnd
+        self._rect = WindowSelector.get_window_rect(hwnd)
+        self._polled = time.perf_counter()
+        self._closed = False
+        self._hooked = False
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+        self._ready.wait(1.0)
+
+    def get_rect(self):
+        """
+        The window's (left, top, right, bottom). Raises RuntimeError once it is gone.
+        """
+        if not self._hooked:
+            now = time.perf_counter()
+            if now - self._polled >= self.POLL_INTERVAL:
+                self._rect = WindowSelector.get_window_rect(self.hwnd)
+                self._polled = now
+            return self._rect
+        if self._closed:
+            raise RuntimeError("Target window was closed")
+        return self._rect
+
+    def _on_event(self, hook, event, hwnd, id_object, id_child, thread_id, time_ms):
+        # The hooks see every object of the target's thread: only the window itself counts
+        if hwnd != self.hwnd or id_object != OBJID_WINDOW or id_child != 0:
+            return
+        if event == EVENT_OBJECT_DESTROY:
+            self._closed = True
+            return
+        try:
+            self._rect = win32gui.GetWindowRect(hwnd)
+        except Exception:
+            self._closed = True
+
+    def _pump(self):
+        user32 = ctypes.windll.user32
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WINEVENTPROC,
+                                           wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        # Kept on self: the callback must outlive the hooks
+        self._callback = WINEVENTPROC(self._on_event)
+        hooks = []
+        try:
+            thread_id, pid = win32process.GetWindowThreadProcessId(self.hwnd)
+            for event in (EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_DESTROY):
+                hook = user32.SetWinEventHook(event, event, None, self._callback, pid, thread_id, WINEVENT_OUTOFCONTEXT)
+                if not hook:
+                    raise OSError(f"SetWinEventHook failed for event {event:#x}")
+                hooks.append(hook)
+            # The window may have moved between the first GetWindowRect and the hooks
+            self._rect = win32gui.GetWindowRect(self.hwnd)
+            self._hooked = True
+        except Exception as e:
+            print(f"Window event hooks unavailable, polling the window rect: {e}")
+        self._ready.set()
+
+        # Out-of-context WinEvents are delivered through this thread's message queue
+        msg = wintypes.MSG()
+        while self._hooked and user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        for hook in hooks:
+            user32.UnhookWinEvent(wintypes.HANDLE(hook))
+
+    def stop(self):
+        if self._thread_id is not None and self._thread.is_alive():
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread.join(timeout=1.0)
+
 if __name__ == "__main__":
     selector = WindowSelector()
     wins = selector.get_visible_windows()
@@ -0,0 +1,84 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import engine
+
+
+class _Input:
+    def __init__(self, name, shape):
+        self.name, self.shape, self.type = name, shape, 'tensor(float16)'
+
+
+class _FP16Session:
+    """Stands in for an FP16-converted RIFE model: checks input dtypes, returns the mean."""
+    def run(self, outputs, feed):
+        assert all(v.dtype == np.float16 for v in feed.values())
+        return [((feed["img0"].astype(np.float32) + feed["img1"]) * 0.5).astype(np.float16)]
+
+
+def _fp16_engine(dynamic_batch=False):
+    e = engine.RIFEONNXEngine.__new__(engine.RIFEONNXEngine)
+    e.session = _FP16Session()
+    e._use_binding = False
+    e._specialized = None
+    e._dynamic_batch = dynamic_batch
+    e._img_names = ("img0", "img1")
+    e._timestep_name = "timestep"
+    e._timestep_shape = [1]
+    e._timestep_dtype = e._input_dtype = np.float16
+    e._output_name = "output"
+    e._nchw = [None, None]
+    e._nchw32 = [None, None]
+    e._flow_engine = None
+    e._thumb = (None, None)
+    e._pool = None
+    return e
+
+
+def _frames(h=24, w=32):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (h, w, 3), dtype=np.uint8), rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+
+
+class FP16PathTest(unittest.TestCase):
+    """Runs against whatever cv2 is installed; the pinned 4.12 has no CV_16F arithmetic."""
+
+    def test_to_nchw_half_matches_float32(self):
+        frame, _ = _frames()
+        out = np.empty((1, 3) + frame.shape[:2], dtype=np.float16)
+        engine._to_nchw_half(frame, out)
+        expected = (frame.transpose(2, 0, 1)[None] / np.float32(255.0)).astype(np.float16)
+        self.assertTrue(np.array_equal(out, expected))
+
+    def test_from_nchw_half_output(self):
+        frame, _ = _frames()
+        output = (frame.transpose(2, 0, 1) / np.float32(255.0)).astype(np.float16)
+        result = engine._from_nchw(output)
+        self.assertEqual(result.dtype, np.uint8)
+        self.assertTrue(result.flags['C_CONTIGUOUS'])
+        self.assertLessEqual(np.abs(result.astype(int) - frame).max(), 1)
+
+    def test_interpolate_network(self):
+        f1, f2 = _frames()
+        mid = _fp16_engine()._interpolate_network(f1, f2)
+        # The error path hands back frame2 itself
+        self.assertIsNot(mid, f2)
+        self.assertLessEqual(np.abs(mid - (f1.astype(np.float32) + f2) * 0.5).max(), 1.5)
+
+    def test_batch_network(self):
+        f1, f2 = _frames()
+        e = _fp16_engine(dynamic_batch=True)
+        mids = e._batch_network([(f1, f2), (f2, f1)])
+        # A failed batch would have switched batching off and gone pair by pair
+        self.assertTrue(e._dynamic_batch)
+        self.assertEqual(len(mids), 2)
+        for m in mids:
+            self.assertLessEqual(np.abs(m - (f1.astype(np.float32) + f2) * 0.5).max(), 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
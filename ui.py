@@ -45,7 +45,7 @@ class GameSelectorUI:
         mode_frame = tk.Frame(self.root, pady=5)
         mode_frame.pack()
         tk.Label(mode_frame, text="Capture Mode: ").grid(row=0, column=0)
-        self.mode_var = tk.StringVar(value="bitblt")
+        self.mode_var = tk.StringVar(value="dxcam")
         self.mode_combo = ttk.Combobox(mode_frame, textvariable=self.mode_var, values=["dxcam", "bitblt"], state="readonly", width=10)
         self.mode_combo.grid(row=0, column=1)
 
@@ -85,6 +85,12 @@ class GameSelectorUI:
         self.engine_var = tk.StringVar(value="AI (RIFE ONNX)")
         self.engine_combo = ttk.Combobox(fg_frame, textvariable=self.engine_var, values=["AI (RIFE ONNX)", "Fast (DIS Flow)"], state="readonly", width=15)
         self.engine_combo.grid(row=0, column=1, padx=5)
+        
+        # Model precision for the RIFE ONNX engine (Auto: FP16 on GPU, FP32 on CPU)
+        tk.Label(fg_frame, text="Precisión IA: ").grid(row=1, column=0, sticky="e")
+        self.precision_var = tk.StringVar(value="Auto")
+        self.precision_combo = ttk.Combobox(fg_frame, textvariable=self.precision_var, values=["Auto", "FP16", "FP32", "INT8"], state="readonly", width=15)
+        self.precision_combo.grid(row=1, column=1, padx=5, pady=(5, 0))
 
         # Advanced Toggles
         adv_frame = tk.Frame(self.root, pady=5)
@@ -101,6 +107,10 @@ class GameSelectorUI:
         self.low_latency_var = tk.BooleanVar(value=True)
         self.low_latency_check = tk.Checkbutton(adv_frame, text="Baja Latencia (Buffer Mínimo)", variable=self.low_latency_var)
         self.low_latency_check.grid(row=1, column=0, columnspan=2, pady=5)
+        
+        self.fast_warp_var = tk.BooleanVar(value=False)
+        self.fast_warp_check = tk.Checkbutton(adv_frame, text="Warp Rápido (1/4 Res, Menos Nitidez)", variable=self.fast_warp_var)
+        self.fast_warp_check.grid(row=2, column=0, columnspan=2)
 
         # Sharpening Selection
         sharp_frame = tk.Frame(self.root, pady=5)
@@ -144,8 +154,10 @@ class GameSelectorUI:
                 "sharpness": self.sharp_var.get(),
                 "fg_enabled": self.fg_var.get(),
                 "engine_type": self.engine_var.get(),
+                "precision": self.precision_var.get().lower(),
                 "ultra_smooth": self.ultra_smooth_var.get(),
                 "performance_mode": self.perf_mode_var.get(),
+                "fast_warp": self.fast_warp_var.get(),
                 "low_latency": self.low_latency_var.get()
             }
             self.root.destroy()